@@ -2,11 +2,12 @@ import streamlit as st
 import requests
 import pandas as pd
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
 from dotenv import load_dotenv
 from nba_api.stats.static import players
 from nba_api.stats.endpoints import playercareerstats
+from nba_predictor_app.mcp_agents.tools.leaderboards import get_leaderboard
 
 # Load environment variables
 load_dotenv()
@@ -130,10 +131,24 @@ Please analyze these statistics and answer the question."""
     except Exception as e:
         return f"Error calling ChatGPT API: {str(e)}"
 
-def display_stat_with_progress(label: str, value: float, max_value: float, format_str: str = "{:.1f}"):
-    """Display a statistic with a progress bar"""
-    st.write(f"**{label}:** {format_str.format(value)}")
-    st.progress(min(value / max_value, 1.0))
+def get_league_percentiles(player_id: int, season: str) -> Dict[str, Optional[float]]:
+    """Get a player's league percentiles, or an empty dict if they are unavailable."""
+    try:
+        # Leaderboards are cached by the leaderboards module, which refetches
+        # the season in progress once it expires
+        return get_leaderboard(season).player_percentiles(player_id) or {}
+    except Exception:
+        return {}
+
+def display_stat_with_progress(label: str, value: float, max_value: float, format_str: str = "{:.1f}",
+                               percentile: Optional[float] = None):
+    """Display a statistic with a progress bar, filled to the league percentile when known"""
+    if percentile is not None:
+        st.write(f"**{label}:** {format_str.format(value)} (league percentile: {percentile:.0f})")
+        st.progress(min(percentile / 100, 1.0))
+    else:
+        st.write(f"**{label}:** {format_str.format(value)}")
+        st.progress(min(value / max_value, 1.0))
 
 # Set up the page
 st.set_page_config(
@@ -209,6 +224,7 @@ if st.button("Search Player"):
 if st.session_state.current_stats is not None:
     stats = st.session_state.current_stats["stats"]
     season = st.session_state.current_stats["season"]
+    percentiles = get_league_percentiles(st.session_state.current_stats["player"]["id"], season)
     
     st.subheader(f"Statistics for {season} Season")
     
@@ -218,25 +234,25 @@ if st.session_state.current_stats is not None:
     # Scoring stats
     with stats_cols[0]:
         st.markdown("**Scoring**")
-        display_stat_with_progress("Points Per Game", stats['PTS'], 40)  # 40 points is exceptional
-        display_stat_with_progress("Field Goal %", stats['FG_PCT'] * 100, 100, "{:.1f}%")
-        display_stat_with_progress("3-Point %", stats['FG3_PCT'] * 100, 100, "{:.1f}%")
-        display_stat_with_progress("Free Throw %", stats['FT_PCT'] * 100, 100, "{:.1f}%")
+        display_stat_with_progress("Points Per Game", stats['PTS'], 40, percentile=percentiles.get('PTS'))  # 40 points is exceptional
+        display_stat_with_progress("Field Goal %", stats['FG_PCT'] * 100, 100, "{:.1f}%", percentiles.get('FG_PCT'))
+        display_stat_with_progress("3-Point %", stats['FG3_PCT'] * 100, 100, "{:.1f}%", percentiles.get('FG3_PCT'))
+        display_stat_with_progress("Free Throw %", stats['FT_PCT'] * 100, 100, "{:.1f}%", percentiles.get('FT_PCT'))
     
     # Other key stats
     with stats_cols[1]:
         st.markdown("**Other Stats**")
-        display_stat_with_progress("Rebounds Per Game", stats['REB'], 15)  # 15 rebounds is exceptional
-        display_stat_with_progress("Assists Per Game", stats['AST'], 12)   # 12 assists is exceptional
-        display_stat_with_progress("Steals Per Game", stats['STL'], 3)     # 3 steals is exceptional
-        display_stat_with_progress("Blocks Per Game", stats['BLK'], 3)     # 3 blocks is exceptional
+        display_stat_with_progress("Rebounds Per Game", stats['REB'], 15, percentile=percentiles.get('REB'))  # 15 rebounds is exceptional
+        display_stat_with_progress("Assists Per Game", stats['AST'], 12, percentile=percentiles.get('AST'))   # 12 assists is exceptional
+        display_stat_with_progress("Steals Per Game", stats['STL'], 3, percentile=percentiles.get('STL'))     # 3 steals is exceptional
+        display_stat_with_progress("Blocks Per Game", stats['BLK'], 3, percentile=percentiles.get('BLK'))     # 3 blocks is exceptional
     
     # Playing time
     with stats_cols[2]:
         st.markdown("**Playing Time**")
         st.metric("Games Played", int(stats['GP']))
         st.metric("Games Started", int(stats['GS']))
-        display_stat_with_progress("Minutes Per Game", stats['MIN'], 48)  # 48 minutes is max possible
+        display_stat_with_progress("Minutes Per Game", stats['MIN'], 48, percentile=percentiles.get('MIN'))  # 48 minutes is max possible
     
     # Show detailed stats in an expander
     with st.expander("View Detailed Statistics"):
@@ -1,12 +1,27 @@
 from mcp.server.fastmcp import FastMCP
 from nba_api.stats.static import players
-from nba_api.stats.endpoints import playercareerstats
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from datetime import datetime
 import pandas as pd
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+from nba_predictor_app.database.db import get_db
+from nba_predictor_app.database.models import Game
+from nba_predictor_app.mcp_agents.tools.careers import career_cache, current_season, season_year
+from nba_predictor_app.mcp_agents.tools.leaderboards import LEADERBOARD_STATS, SEASON_PATTERN, get_leaderboard
+from nba_predictor_app.mcp_agents.tools.refresh import RefreshScheduler
+from nba_predictor_app.mcp_agents.tools.similar import get_similarity_index
+from nba_predictor_app.mcp_agents.tools.simulator import (
+    MAX_SIMULATIONS,
+    SIMULATION_WORKERS,
+    SeasonSchedule,
+    simulate_season,
+    start_simulation_pool,
+    stop_simulation_pool,
+)
 
 # Create FastAPI app
 app = FastAPI()
@@ -20,6 +35,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Keep current-season data for active players fresh in the background
+refresh_scheduler = RefreshScheduler(career_cache)
+
+@app.on_event("startup")
+async def start_refresh_scheduler():
+    refresh_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_refresh_scheduler():
+    refresh_scheduler.stop()
+
+@app.on_event("startup")
+async def start_simulations():
+    start_simulation_pool()
+
+@app.on_event("shutdown")
+async def stop_simulations():
+    stop_simulation_pool()
+
 # Create MCP server
 mcp = FastMCP(
     "nba_predictor",
@@ -38,6 +72,29 @@ class PlayerStatsRequest(BaseModel):
 class PlayerSeasonsRequest(BaseModel):
     player_id: int
 
+class LeagueLeadersRequest(BaseModel):
+    season: str = Field("2023-24", pattern=SEASON_PATTERN)
+    stat: str = "PTS"
+    limit: int = 10
+
+class PlayerPercentilesRequest(BaseModel):
+    player_id: int
+    season: str = Field("2023-24", pattern=SEASON_PATTERN)
+
+class SimilarPlayersRequest(BaseModel):
+    player_id: int
+    season: str = Field("2023-24", pattern=SEASON_PATTERN)
+    k: int = 10
+    min_season: Optional[str] = Field(None, pattern=SEASON_PATTERN)
+    max_season: Optional[str] = Field(None, pattern=SEASON_PATTERN)
+    min_minutes: float = 0.0
+
+class SimulateSeasonRequest(BaseModel):
+    season: Optional[str] = None
+    simulations: int = Field(100_000, ge=1, le=MAX_SIMULATIONS)
+    seed: Optional[int] = Field(None, ge=0)
+    workers: Optional[int] = Field(None, ge=1, le=max(SIMULATION_WORKERS, 1))
+
 @app.post("/tools/search_player")
 async def search_player_endpoint(request: PlayerSearchRequest):
     """
@@ -72,30 +129,25 @@ async def get_player_stats_endpoint(request: PlayerStatsRequest):
     """
     try:
         # Get career stats which includes season-by-season breakdown
-        career_stats = playercareerstats.PlayerCareerStats(player_id=request.player_id)
-        
-        # Convert to pandas DataFrame
-        season_stats = career_stats.get_data_frames()[0]
+        career = career_cache.get(request.player_id)
         
         # Filter for the requested season
-        season_data = season_stats[season_stats['SEASON_ID'] == request.season].to_dict('records')
+        season_data = career.to_records(career.season(request.season))
         
         if season_data:
             stats = season_data[0]
             games_played = stats['GP']
             
-            # Calculate per-game averages
-            if games_played > 0:
-                stats['PTS'] = stats['PTS'] / games_played
-                stats['REB'] = stats['REB'] / games_played
-                stats['AST'] = stats['AST'] / games_played
-                stats['STL'] = stats['STL'] / games_played
-                stats['BLK'] = stats['BLK'] / games_played
-                stats['MIN'] = stats['MIN'] / games_played
+            # Calculate per-game averages, skipping stats not tracked that season
+            if games_played:
+                for column in ['PTS', 'REB', 'AST', 'STL', 'BLK', 'MIN']:
+                    if stats[column] is not None:
+                        stats[column] = stats[column] / games_played
             
             return {
                 "success": True,
-                "stats": stats
+                "stats": stats,
+                **career_cache.freshness(career)
             }
         else:
             return {
@@ -115,13 +167,131 @@ async def get_available_seasons_endpoint(request: PlayerSeasonsRequest):
     Get all available seasons for a player.
     """
     try:
-        career_stats = playercareerstats.PlayerCareerStats(player_id=request.player_id)
-        seasons_df = career_stats.get_data_frames()[0]
-        available_seasons = seasons_df['SEASON_ID'].tolist()
+        career = career_cache.get(request.player_id)
+        available_seasons = career.season_ids()
         
         return {
             "success": True,
-            "seasons": available_seasons
+            "seasons": available_seasons,
+            **career_cache.freshness(career)
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+# A plain def runs in FastAPI's threadpool, so fetching a season that is
+# not cached does not block the event loop
+@app.post("/tools/league_leaders")
+def league_leaders_endpoint(request: LeagueLeadersRequest):
+    """
+    Get the league leaders for a stat in a given season.
+    """
+    if request.stat not in LEADERBOARD_STATS:
+        return {
+            "success": False,
+            "message": f"Unknown stat {request.stat}, expected one of {', '.join(LEADERBOARD_STATS)}"
+        }
+
+    try:
+        leaderboard = get_leaderboard(request.season)
+        return {
+            "success": True,
+            "leaders": leaderboard.top(request.stat, request.limit)
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+@app.post("/tools/get_player_percentiles")
+def get_player_percentiles_endpoint(request: PlayerPercentilesRequest):
+    """
+    Get a player's league percentiles for a given season.
+    """
+    try:
+        leaderboard = get_leaderboard(request.season)
+        percentiles = leaderboard.player_percentiles(request.player_id)
+
+        if percentiles is not None:
+            return {
+                "success": True,
+                "percentiles": percentiles
+            }
+        else:
+            return {
+                "success": False,
+                "message": f"No stats found for season {request.season}"
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+@app.post("/tools/similar_players")
+async def similar_players_endpoint(request: SimilarPlayersRequest):
+    """
+    Find the player-seasons most comparable to a player's season.
+    """
+    index = get_similarity_index()
+    if index is None:
+        return {
+            "success": False,
+            "message": "The similar-player index is still being built, try again shortly"
+        }
+
+    try:
+        similar = index.query(
+            request.player_id,
+            request.season,
+            k=request.k,
+            min_season=request.min_season,
+            max_season=request.max_season,
+            min_minutes=request.min_minutes
+        )
+
+        if similar is not None:
+            return {
+                "success": True,
+                "similar_players": similar
+            }
+        else:
+            return {
+                "success": False,
+                "message": f"No stats found for season {request.season}"
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+# A plain def runs in FastAPI's threadpool, so the simulation does not
+# block the event loop
+@app.post("/tools/simulate_season")
+def simulate_season_endpoint(request: SimulateSeasonRequest, db: Session = Depends(get_db)):
+    """
+    Simulate the rest of a season from game predictions to get playoff and win-total odds.
+    """
+    try:
+        # Seasons run from October to the following September
+        start_year = season_year(request.season or current_season())
+        games = db.query(Game).filter(
+            Game.game_date >= datetime(start_year, 10, 1),
+            Game.game_date < datetime(start_year + 1, 10, 1)
+        ).all()
+
+        return {
+            "success": True,
+            **simulate_season(
+                SeasonSchedule.from_games(games),
+                n_simulations=request.simulations,
+                seed=request.seed,
+                workers=request.workers
+            )
         }
     except Exception as e:
         return {
@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Set
+from nba_api.stats.static import players
+from nba_api.stats.endpoints import playercareerstats
+from .resilience import call_stats_endpoint
+
+logger = logging.getLogger(__name__)
+
+# Seconds after which an active player's cached career is served as stale
+# and revalidated in the background. Retired players' careers never go stale.
+CAREER_MAX_AGE = float(os.getenv("CAREER_MAX_AGE_SECONDS", "3600"))
+
+# Budget for one cached career, including object overhead. Season rows are
+# 72 bytes, so even a 20-season career with trades fits, and every player in
+# league history (about 5,000) fits in 20 MB.
+TARGET_BYTES_PER_PLAYER = 4096
+
+# Season totals kept for every season row. Counting stats are whole numbers
+# well below 32,767 even over a full season; percentages keep full precision
+# so they round-trip exactly.
+COUNTING_COLUMNS = [
+    "GP", "GS", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PTS",
+]
+PERCENTAGE_COLUMNS = ["FG_PCT", "FG3_PCT", "FT_PCT"]
+STAT_COLUMNS = [
+    "GP", "GS", "MIN", "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT",
+    "FTM", "FTA", "FT_PCT", "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PTS",
+]
+
+# Stored for counting stats the league did not track yet (e.g. steals before
+# 1973-74); percentages use NaN
+MISSING = -1
+
+CAREER_DTYPE = np.dtype(
+    [("season", np.int16), ("team", np.int16), ("team_id", np.int32), ("age", np.float32)]
+    + [(column, np.int16) for column in COUNTING_COLUMNS]
+    + [(column, np.float64) for column in PERCENTAGE_COLUMNS]
+)
+
+
+def season_year(season: str) -> int:
+    """Return the year a season (e.g. "2015-16") started in."""
+    return int(season[:4])
+
+
+def season_id(year: int) -> str:
+    """Return the season ID (e.g. "2015-16") of a season starting in a given year."""
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def current_season(today: Optional[date] = None) -> str:
+    """Return the season ID (e.g. "2023-24") in progress on a given day."""
+    today = today or date.today()
+    # Seasons tip off in October
+    return season_id(today.year if today.month >= 10 else today.year - 1)
+
+
+class CodeTable:
+    """Interns repeated strings as small integer codes shared by every career."""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+        self._lock = threading.Lock()
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.setdefault(value, len(self._values))
+                if code == len(self._values):
+                    self._values.append(value)
+        return code
+
+    def value(self, code: int) -> str:
+        return self._values[code]
+
+
+team_codes = CodeTable()
+
+
+class CompactCareer:
+    """A player's season totals as one structured array, ordered by season."""
+
+    __slots__ = ("player_id", "records", "fetched_at", "expires_at")
+
+    def __init__(self, player_id: int, records: np.ndarray):
+        self.player_id = player_id
+        self.records = records
+        # Set by the cache when the career is stored or confirmed unchanged
+        self.fetched_at = 0.0
+        self.expires_at = 0.0
+
+    @classmethod
+    def from_frame(cls, player_id: int, frame: pd.DataFrame) -> "CompactCareer":
+        """Build a compact career from PlayerCareerStats season totals."""
+        records = np.zeros(len(frame), dtype=CAREER_DTYPE)
+        records["season"] = frame["SEASON_ID"].str[:4].astype(int).to_numpy()
+        records["team"] = [team_codes.code(team) for team in frame["TEAM_ABBREVIATION"]]
+        records["team_id"] = frame["TEAM_ID"].to_numpy()
+        records["age"] = pd.to_numeric(frame["PLAYER_AGE"], errors="coerce").to_numpy(dtype=np.float32)
+        for column in COUNTING_COLUMNS:
+            values = pd.to_numeric(frame[column], errors="coerce")
+            records[column] = values.round().fillna(MISSING).to_numpy(dtype=np.int16)
+        for column in PERCENTAGE_COLUMNS:
+            records[column] = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64)
+        # Rows for the same season (a traded player's teams) keep their order
+        order = np.argsort(records["season"], kind="stable")
+        return cls(player_id, records[order])
+
+    def season(self, season: str) -> np.ndarray:
+        """Return the rows for a season as a view into the career, without copying."""
+        year = season_year(season)
+        seasons = self.records["season"]
+        start = np.searchsorted(seasons, year, side="left")
+        end = np.searchsorted(seasons, year, side="right")
+        return self.records[start:end]
+
+    def season_ids(self) -> List[str]:
+        """Return the season ID of every row, in order."""
+        return [season_id(int(year)) for year in self.records["season"]]
+
+    def to_records(self, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Convert rows (by default the whole career) back to PlayerCareerStats-style dicts."""
+        rows = self.records if rows is None else rows
+        return [
+            {
+                "PLAYER_ID": self.player_id,
+                "SEASON_ID": season_id(int(row["season"])),
+                "LEAGUE_ID": "00",
+                "TEAM_ID": int(row["team_id"]),
+                "TEAM_ABBREVIATION": team_codes.value(int(row["team"])),
+                "PLAYER_AGE": _to_python(row["age"]),
+                **{column: _to_python(row[column]) for column in STAT_COLUMNS},
+            }
+            for row in rows
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by this career, including object overhead."""
+        return sys.getsizeof(self) + sys.getsizeof(self.records)
+
+
+def _to_python(value):
+    """Convert a stored value to int, float or None for a missing stat."""
+    if isinstance(value, np.integer):
+        return None if value == MISSING else int(value)
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def fetch_career(player_id: int) -> pd.DataFrame:
+    """Fetch a player's regular season totals, one row per season and team."""
+    career_stats = call_stats_endpoint(playercareerstats.PlayerCareerStats, player_id=player_id)
+    return career_stats.get_data_frames()[0]
+
+
+class CareerCache:
+    """In-memory cache of compact player careers, filled on first request.
+
+    Stale careers are served immediately and revalidated in the background,
+    so an upstream outage only delays requests for players never seen before.
+    """
+
+    def __init__(self, max_age: float = CAREER_MAX_AGE):
+        self.max_age = max_age
+        self._careers: Dict[int, CompactCareer] = {}
+        self._lock = threading.Lock()
+        self._revalidating: Set[int] = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="career-revalidate")
+
+    def get(self, player_id: int) -> CompactCareer:
+        """Return a player's career, fetching it on a cache miss and revalidating it when stale."""
+        career = self._careers.get(player_id)
+        if career is None:
+            return self.put(player_id, fetch_career(player_id))
+        if time.time() >= career.expires_at:
+            self._revalidate(player_id)
+        return career
+
+    def put(self, player_id: int, frame: pd.DataFrame) -> CompactCareer:
+        """Store or replace a player's career from PlayerCareerStats season totals."""
+        career = CompactCareer.from_frame(player_id, frame)
+        self._mark_fresh(career)
+        with self._lock:
+            self._careers[player_id] = career
+        return career
+
+    def touch(self, player_ids: Iterable[int]):
+        """Mark cached careers as fresh after confirming upstream has not changed them."""
+        for player_id in player_ids:
+            career = self._careers.get(player_id)
+            if career is not None:
+                self._mark_fresh(career)
+
+    def freshness(self, career: CompactCareer) -> Dict[str, Any]:
+        """Describe how fresh a served career is."""
+        now = time.time()
+        return {
+            "stale": now >= career.expires_at,
+            "age_seconds": now - career.fetched_at,
+        }
+
+    def _mark_fresh(self, career: CompactCareer):
+        career.fetched_at = time.time()
+        player = players.find_player_by_id(career.player_id)
+        if player is not None and not player["is_active"]:
+            career.expires_at = float("inf")
+        else:
+            career.expires_at = career.fetched_at + self.max_age
+
+    def _revalidate(self, player_id: int):
+        with self._lock:
+            if player_id in self._revalidating:
+                return
+            self._revalidating.add(player_id)
+        self._executor.submit(self._refetch, player_id)
+
+    def _refetch(self, player_id: int):
+        try:
+            self.put(player_id, fetch_career(player_id))
+        except Exception as e:
+            # Keep serving the stale career; the next request retries
+            logger.warning("Revalidating career %s failed: %s", player_id, e)
+        finally:
+            with self._lock:
+                self._revalidating.discard(player_id)
+
+    def cached_player_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._careers)
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Measure the memory held by cached careers against TARGET_BYTES_PER_PLAYER."""
+        with self._lock:
+            careers = list(self._careers.values())
+        total = sum(career.nbytes for career in careers)
+        per_player = total / len(careers) if careers else 0.0
+        return {
+            "players": len(careers),
+            "bytes": total,
+            "bytes_per_player": per_player,
+            "within_target": per_player <= TARGET_BYTES_PER_PLAYER,
+        }
+
+
+# Shared by the server endpoints and the refresh scheduler
+career_cache = CareerCache()
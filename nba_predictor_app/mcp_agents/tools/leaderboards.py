@@ -0,0 +1,241 @@
+import os
+import re
+import time
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+from nba_api.stats.endpoints import leaguedashplayerstats
+from .careers import current_season, season_year
+from .resilience import RateLimiter, call_stats_endpoint
+
+logger = logging.getLogger(__name__)
+
+# Counting stats are ranked per game, shooting percentages as-is
+COUNTING_STATS = ["PTS", "REB", "AST", "STL", "BLK", "TOV", "MIN"]
+PERCENTAGE_STATS = ["FG_PCT", "FG3_PCT", "FT_PCT"]
+LEADERBOARD_STATS = COUNTING_STATS + PERCENTAGE_STATS
+
+# Qualification rules: a minimum number of games for every stat, plus a
+# minimum number of attempts per game for the shooting percentages
+MIN_GAMES = 20
+MIN_ATTEMPTS_PER_GAME = {
+    "FG_PCT": ("FGA", 5.0),
+    "FG3_PCT": ("FG3A", 1.0),
+    "FT_PCT": ("FTA", 1.0),
+}
+
+LEADERBOARD_DIR = os.getenv("LEADERBOARD_DIR", "./leaderboards")
+# Seconds before a season still in progress, or one upstream returned no
+# players for, is fetched again. Only finished seasons with players are
+# persisted, since their numbers can no longer change.
+LEADERBOARD_TTL = float(os.getenv("LEADERBOARD_TTL_SECONDS", "900"))
+
+# Season IDs look like "2015-16"; they also name the persisted files
+SEASON_PATTERN = r"^\d{4}-\d{2}$"
+
+# Leaderboards already loaded in this process, keyed by season
+_leaderboards: Dict[str, "Leaderboard"] = {}
+
+
+class Leaderboard:
+    """Per-season rankings of every player for every leaderboard stat."""
+
+    def __init__(self, season: str, player_ids: np.ndarray, player_names: np.ndarray,
+                 games: np.ndarray, values: np.ndarray, qualified: np.ndarray,
+                 order: Optional[np.ndarray] = None, percentiles: Optional[np.ndarray] = None):
+        self.season = season
+        self.built_at = time.time()
+        self.player_ids = player_ids
+        self.player_names = player_names
+        self.games = games
+        # One row per player, one column per entry of LEADERBOARD_STATS
+        self.values = values
+        self.qualified = qualified
+        self.qualified_counts = qualified.sum(axis=0)
+
+        self._stat_index = {stat: i for i, stat in enumerate(LEADERBOARD_STATS)}
+        self._player_index = {int(pid): i for i, pid in enumerate(player_ids)}
+
+        if order is None or percentiles is None:
+            order, percentiles = self._build_indexes()
+        self.order = order
+        self.percentiles = percentiles
+
+    def _build_indexes(self):
+        """Compute the rank order and league percentiles for all stats at once."""
+        # Unqualified players sort after everyone else
+        masked = np.where(self.qualified, self.values, -np.inf)
+        order = np.argsort(-masked, axis=0, kind="stable")
+
+        # Percentile of every player (qualified or not) against the qualified field
+        percentiles = np.zeros(self.values.shape, dtype=np.float64)
+        for j in range(len(LEADERBOARD_STATS)):
+            field = np.sort(self.values[self.qualified[:, j], j])
+            if len(field) > 0:
+                below = np.searchsorted(field, self.values[:, j], side="right")
+                percentiles[:, j] = below / len(field) * 100
+        return order, percentiles
+
+    def top(self, stat: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return the top qualified players for a stat."""
+        j = self._stat_index[stat]
+        count = min(max(limit, 0), int(self.qualified_counts[j]))
+        return [
+            {
+                "rank": rank + 1,
+                "player_id": int(self.player_ids[i]),
+                "player_name": str(self.player_names[i]),
+                "games": int(self.games[i]),
+                "value": float(self.values[i, j]),
+            }
+            for rank, i in enumerate(self.order[:count, j])
+        ]
+
+    def percentile(self, player_id: int, stat: str) -> Optional[float]:
+        """Return a player's league percentile for a stat, or None if they do not qualify for it."""
+        i = self._player_index.get(player_id)
+        if i is None:
+            return None
+        return self._qualified_percentile(i, self._stat_index[stat])
+
+    def player_percentiles(self, player_id: int) -> Optional[Dict[str, Optional[float]]]:
+        """Return a player's league percentile for every leaderboard stat, None where they do not qualify."""
+        i = self._player_index.get(player_id)
+        if i is None:
+            return None
+        return {stat: self._qualified_percentile(i, j) for j, stat in enumerate(LEADERBOARD_STATS)}
+
+    def _qualified_percentile(self, i: int, j: int) -> Optional[float]:
+        # A handful of games or attempts says nothing about where a player ranks
+        if not self.qualified[i, j]:
+            return None
+        return float(self.percentiles[i, j])
+
+    def save(self, directory: str = LEADERBOARD_DIR):
+        """Persist the leaderboard and its rank indexes."""
+        os.makedirs(directory, exist_ok=True)
+        path = _leaderboard_path(self.season, directory)
+        # Write to a temporary file of our own first, so readers never see a
+        # partial file and concurrent writers never share one
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    player_ids=self.player_ids,
+                    player_names=self.player_names,
+                    games=self.games,
+                    values=self.values,
+                    qualified=self.qualified,
+                    order=self.order,
+                    percentiles=self.percentiles,
+                )
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, season: str, directory: str = LEADERBOARD_DIR) -> Optional["Leaderboard"]:
+        """Load a persisted leaderboard, or return None if there is none."""
+        path = _leaderboard_path(season, directory)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if data["values"].dtype != np.float64:
+                # Written before values kept full precision; fetch it again
+                return None
+            return cls(season, **{name: data[name] for name in data.files})
+
+
+def _leaderboard_path(season: str, directory: str) -> str:
+    if not re.match(SEASON_PATTERN, season):
+        raise ValueError(f"Invalid season {season!r}, expected e.g. 2015-16")
+    return os.path.join(directory, f"leaderboard_{season}.npz")
+
+
+def fetch_season_totals(season: str) -> pd.DataFrame:
+    """Fetch season totals for every player in a single league-wide request."""
+    league_stats = call_stats_endpoint(
+        leaguedashplayerstats.LeagueDashPlayerStats,
+        season=season,
+        per_mode_detailed="Totals"
+    )
+    return league_stats.get_data_frames()[0]
+
+
+def build_leaderboard(season: str, totals: pd.DataFrame) -> Leaderboard:
+    """Build a leaderboard from league-wide season totals."""
+    games = totals["GP"].to_numpy(dtype=np.int32)
+    per_game_divisor = np.maximum(games, 1)[:, None]
+
+    # Full precision, so a 0.505 shooting percentage is served as 0.505
+    counting = totals[COUNTING_STATS].fillna(0).to_numpy(dtype=np.float64) / per_game_divisor
+    percentages = totals[PERCENTAGE_STATS].fillna(0).to_numpy(dtype=np.float64)
+    values = np.hstack([counting, percentages])
+
+    qualified = np.repeat((games >= MIN_GAMES)[:, None], len(LEADERBOARD_STATS), axis=1)
+    for stat, (attempts_column, min_attempts) in MIN_ATTEMPTS_PER_GAME.items():
+        attempts = totals[attempts_column].fillna(0).to_numpy(dtype=np.float64) / per_game_divisor[:, 0]
+        qualified[:, LEADERBOARD_STATS.index(stat)] &= attempts >= min_attempts
+
+    return Leaderboard(
+        season,
+        player_ids=totals["PLAYER_ID"].to_numpy(dtype=np.int64),
+        player_names=totals["PLAYER_NAME"].to_numpy(dtype=str),
+        games=games,
+        values=values,
+        qualified=qualified,
+    )
+
+
+def _in_progress(season: str) -> bool:
+    return season_year(season) >= season_year(current_season())
+
+
+def _is_final(leaderboard: Leaderboard) -> bool:
+    # An empty response may be an upstream hiccup, so it is never kept for good
+    return not _in_progress(leaderboard.season) and len(leaderboard.player_ids) > 0
+
+
+def store_leaderboard(leaderboard: Leaderboard):
+    """Serve a leaderboard in place of any earlier one for its season, persisting finished seasons."""
+    if _is_final(leaderboard):
+        leaderboard.save()
+    _leaderboards[leaderboard.season] = leaderboard
+
+
+def touch_leaderboard(season: str):
+    """Mark a season's leaderboard as fresh after confirming upstream has not changed it."""
+    leaderboard = _leaderboards.get(season)
+    if leaderboard is not None:
+        leaderboard.built_at = time.time()
+
+
+def get_leaderboard(season: str, limiter: Optional[RateLimiter] = None) -> Leaderboard:
+    """Return the leaderboard for a season, building it on first use and again once it expires.
+
+    When a limiter is given, a fetch from upstream waits for its turn first.
+    """
+    leaderboard = _leaderboards.get(season)
+    if leaderboard is not None and (_is_final(leaderboard) or time.time() - leaderboard.built_at < LEADERBOARD_TTL):
+        return leaderboard
+
+    if not _in_progress(season):
+        try:
+            leaderboard = Leaderboard.load(season)
+        except Exception as e:
+            # A corrupt file is replaced by fetching the season again
+            logger.warning("Discarding unreadable leaderboard for %s: %s", season, e)
+            leaderboard = None
+        if leaderboard is not None:
+            _leaderboards[season] = leaderboard
+            return leaderboard
+
+    if limiter is not None:
+        limiter.wait()
+    leaderboard = build_leaderboard(season, fetch_season_totals(season))
+    store_leaderboard(leaderboard)
+    return leaderboard
@@ -0,0 +1,147 @@
+import os
+import random
+import logging
+import threading
+import pandas as pd
+from typing import Dict, Any, Optional, Set
+from nba_api.stats.static import players
+from .careers import CareerCache, career_cache, current_season, fetch_career
+from .leaderboards import build_leaderboard, fetch_season_totals, store_leaderboard, touch_leaderboard
+from .resilience import CircuitOpenError, RateLimiter
+from .similar import update_similarity_index
+
+logger = logging.getLogger(__name__)
+
+# How often the current season is checked for changes; 0 disables refreshing,
+# though the scheduler still builds the similarity index
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL_SECONDS", "900"))
+# How often a similarity index missing some seasons is retried when refreshing is disabled
+INDEX_RETRY_INTERVAL = float(os.getenv("INDEX_RETRY_INTERVAL_SECONDS", "300"))
+# Minimum spacing between upstream requests made by the scheduler
+MIN_REQUEST_INTERVAL = float(os.getenv("UPSTREAM_MIN_REQUEST_INTERVAL_SECONDS", "1.0"))
+# Career refetches per refresh; the rest wait for the next one
+MAX_REFETCHES_PER_REFRESH = int(os.getenv("MAX_REFETCHES_PER_REFRESH", "50"))
+
+# Columns whose change means a player's season has changed. Rank columns are
+# left out because they shift whenever anyone else's numbers move.
+HASH_COLUMNS = [
+    "TEAM_ID", "GP", "MIN", "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA",
+    "OREB", "DREB", "REB", "AST", "TOV", "STL", "BLK", "PF", "PTS",
+]
+
+
+class RefreshScheduler:
+    """Periodically refreshes current-season data for active players.
+
+    Each refresh makes one league-wide request for the current season and
+    compares a content hash of every active player's row with the previous
+    refresh. Only players whose numbers changed have their cached career
+    refetched and the season leaderboard is rebuilt only when something
+    changed, so upstream traffic follows what actually changed.
+
+    After each refresh the similarity index is brought up to date, fetching
+    any season leaderboard that is not persisted yet through the same rate
+    limiter.
+    """
+
+    def __init__(self, cache: CareerCache = career_cache, interval: float = REFRESH_INTERVAL,
+                 min_request_interval: float = MIN_REQUEST_INTERVAL,
+                 max_refetches: int = MAX_REFETCHES_PER_REFRESH, season: Optional[str] = None):
+        self.cache = cache
+        self.interval = interval
+        self.max_refetches = max_refetches
+        self.season = season
+        self._limiter = RateLimiter(min_request_interval)
+        self._hashes: Dict[int, int] = {}
+        self._pending: Set[int] = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start refreshing in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.interval > 0:
+                try:
+                    summary = self.refresh_once()
+                    memory = self.cache.memory_usage()
+                    logger.info("Refreshed %s: %s changed, %s careers refetched, %s pending, "
+                                "%s careers cached at %.0f bytes each",
+                                summary["season"], summary["changed"], summary["refetched"], summary["pending"],
+                                memory["players"], memory["bytes_per_player"])
+                except CircuitOpenError as e:
+                    logger.warning("Refresh skipped: %s", e)
+                except Exception:
+                    logger.exception("Refresh failed")
+
+            try:
+                index_complete = update_similarity_index(self._limiter, self._stop)
+            except Exception:
+                logger.exception("Updating the similarity index failed")
+                index_complete = False
+            if self.interval <= 0 and index_complete:
+                return
+
+            # Jitter keeps several workers from hitting the upstream in lockstep
+            interval = self.interval if self.interval > 0 else INDEX_RETRY_INTERVAL
+            self._stop.wait(interval * random.uniform(0.9, 1.1))
+
+    def refresh_once(self) -> Dict[str, Any]:
+        """Refresh the current season once and return a summary of what changed."""
+        season = self.season or current_season()
+
+        self._limiter.wait()
+        totals = fetch_season_totals(season)
+
+        active_ids = {p["id"] for p in players.get_active_players()}
+        active = totals[totals["PLAYER_ID"].isin(active_ids)]
+        player_ids = active["PLAYER_ID"].tolist()
+        hashes = pd.util.hash_pandas_object(active[HASH_COLUMNS], index=False).tolist()
+
+        changed = [
+            player_id for player_id, row_hash in zip(player_ids, hashes)
+            if self._hashes.get(player_id) != row_hash
+        ]
+        self._hashes.update(zip(player_ids, hashes))
+
+        if changed:
+            store_leaderboard(build_leaderboard(season, totals))
+        else:
+            touch_leaderboard(season)
+
+        # Only careers someone has already asked for are kept warm
+        cached_ids = set(self.cache.cached_player_ids())
+        self._pending.update(player_id for player_id in changed if player_id in cached_ids)
+        changed_ids = set(changed)
+        self.cache.touch(
+            player_id for player_id in player_ids
+            if player_id in cached_ids and player_id not in changed_ids and player_id not in self._pending
+        )
+
+        refetched = 0
+        while self._pending and refetched < self.max_refetches and not self._stop.is_set():
+            player_id = self._pending.pop()
+            self._limiter.wait()
+            try:
+                self.cache.put(player_id, fetch_career(player_id))
+                refetched += 1
+            except Exception:
+                # Try again on the next refresh
+                self._pending.add(player_id)
+                raise
+
+        return {
+            "season": season,
+            "changed": len(changed),
+            "refetched": refetched,
+            "pending": len(self._pending),
+        }
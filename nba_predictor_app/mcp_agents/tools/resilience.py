@@ -0,0 +1,144 @@
+import os
+import time
+import threading
+import requests
+from typing import Any, Callable, Optional
+
+# Seconds to wait for stats.nba.com before giving up on a request
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "10"))
+# Consecutive failures that open the circuit, and how long it stays open
+# before a single probe request is let through
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT_SECONDS", "30"))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class UpstreamServerError(Exception):
+    """Raised when an upstream answers with a 5xx status."""
+
+
+def is_transport_failure(error: Exception) -> bool:
+    """Return whether an error means the upstream itself is failing.
+
+    Timeouts, connection errors and 5xx responses count. Anything else, such
+    as a 4xx or a response that does not parse because of bad input, means
+    the upstream answered and says nothing about its health.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is None or error.response.status_code >= 500
+    if isinstance(error, requests.exceptions.InvalidJSONError):
+        return False
+    return isinstance(error, (requests.exceptions.RequestException, UpstreamServerError,
+                              TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    """Stops sending requests to an upstream after repeated failures.
+
+    After failure_threshold consecutive transport failures the circuit opens
+    and calls fail immediately. Once recovery_timeout has passed one probe
+    call is let through: any answer from the upstream closes the circuit, a
+    transport failure opens it again. Other errors pass through untouched.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 recovery_timeout: float = RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call func through the breaker, raising CircuitOpenError if the upstream is down."""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(f"{self.name} is unavailable, retrying in {remaining:.1f}s")
+                self.state = self.HALF_OPEN
+            elif self.state == self.HALF_OPEN:
+                # Only the probe request goes through while recovering
+                raise CircuitOpenError(f"{self.name} is unavailable, recovery check in progress")
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_transport_failure(e):
+                self._record_failure()
+            elif self.state == self.HALF_OPEN:
+                # The probe got an answer, so the upstream is reachable again
+                self._record_success()
+            raise
+        self._record_success()
+        return result
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def _record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+
+class RateLimiter:
+    """Spaces out upstream requests so they stay under a fixed rate."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next request is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Every upstream call for player and league stats goes through this breaker
+stats_breaker = CircuitBreaker("stats.nba.com")
+
+
+def call_stats_endpoint(endpoint_class: Callable[..., Any], **kwargs) -> Any:
+    """Request an nba_api stats endpoint through the breaker, with the upstream timeout."""
+    return stats_breaker.call(_request_stats_endpoint, endpoint_class, **kwargs)
+
+
+def _request_stats_endpoint(endpoint_class: Callable[..., Any], **kwargs) -> Any:
+    endpoint = endpoint_class(timeout=UPSTREAM_TIMEOUT, get_request=False, **kwargs)
+    try:
+        endpoint.get_request()
+    except Exception as e:
+        # nba_api parses the body without looking at the status, so a 5xx
+        # page surfaces as a parse error
+        status = _status_code(endpoint)
+        if status is not None and status >= 500:
+            raise UpstreamServerError(f"{endpoint_class.__name__} returned HTTP {status}") from e
+        raise
+    status = _status_code(endpoint)
+    if status is not None and status >= 500:
+        raise UpstreamServerError(f"{endpoint_class.__name__} returned HTTP {status}")
+    return endpoint
+
+
+def _status_code(endpoint: Any) -> Optional[int]:
+    response = getattr(endpoint, "nba_response", None)
+    return getattr(response, "_status_code", None)
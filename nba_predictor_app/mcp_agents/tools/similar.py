@@ -0,0 +1,142 @@
+import logging
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional
+from .careers import current_season, season_id, season_year
+from .leaderboards import LEADERBOARD_STATS, PERCENTAGE_STATS, Leaderboard, get_leaderboard
+from .resilience import CircuitOpenError, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# League-wide season stats are available from 1996-97 onwards
+FIRST_SEASON_YEAR = 1996
+
+_MINUTES_COLUMN = LEADERBOARD_STATS.index("MIN")
+_PERCENTAGE_COLUMNS = [LEADERBOARD_STATS.index(stat) for stat in PERCENTAGE_STATS]
+
+_index: Optional["SimilarityIndex"] = None
+_index_lock = threading.Lock()
+
+
+class SimilarityIndex:
+    """Nearest-neighbor index over every player-season in league history.
+
+    Each row is a player-season's per-game and shooting stats, z-scored per
+    stat so that no single stat dominates the distance. The mean and spread
+    of each stat come from the player-seasons that qualify for its
+    leaderboard, so a few games or attempts cannot skew them. At a few tens
+    of thousands of rows an exact search over one contiguous matrix answers
+    a query in milliseconds.
+    """
+
+    def __init__(self, leaderboards: List[Leaderboard]):
+        self.leaderboards = leaderboards
+        self.player_ids = np.concatenate([lb.player_ids for lb in leaderboards])
+        self.player_names = np.concatenate([lb.player_names for lb in leaderboards])
+        self.games = np.concatenate([lb.games for lb in leaderboards])
+        self.values = np.concatenate([lb.values for lb in leaderboards])
+        qualified = np.concatenate([lb.qualified for lb in leaderboards])
+        self.seasons = np.concatenate([np.full(len(lb.player_ids), lb.season) for lb in leaderboards])
+        self.season_years = np.concatenate([
+            np.full(len(lb.player_ids), season_year(lb.season), dtype=np.int16) for lb in leaderboards
+        ])
+        self.minutes = self.values[:, _MINUTES_COLUMN]
+
+        mean = np.zeros(len(LEADERBOARD_STATS))
+        std = np.ones(len(LEADERBOARD_STATS))
+        for j in range(len(LEADERBOARD_STATS)):
+            sample = self.values[qualified[:, j], j]
+            if len(sample) == 0:
+                sample = self.values[:, j]
+            if len(sample) > 0:
+                mean[j] = sample.mean()
+                std[j] = sample.std() or 1.0
+        vectors = (self.values - mean) / std
+        # Shooting percentages on too few attempts count as league average
+        percentages = vectors[:, _PERCENTAGE_COLUMNS]
+        percentages[~qualified[:, _PERCENTAGE_COLUMNS]] = 0.0
+        vectors[:, _PERCENTAGE_COLUMNS] = percentages
+        # Distances only need single precision
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.squared_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+        self._row_index = {
+            (int(player_id), str(season)): i
+            for i, (player_id, season) in enumerate(zip(self.player_ids, self.seasons))
+        }
+
+    def query(self, player_id: int, season: str, k: int = 10, min_season: Optional[str] = None,
+              max_season: Optional[str] = None, min_minutes: float = 0.0) -> Optional[List[Dict[str, Any]]]:
+        """Return the k player-seasons closest to a player's season, or None if it is not indexed."""
+        row = self._row_index.get((player_id, season))
+        if row is None:
+            return None
+
+        mask = self.minutes >= min_minutes
+        if min_season is not None:
+            mask &= self.season_years >= season_year(min_season)
+        if max_season is not None:
+            mask &= self.season_years <= season_year(max_season)
+        # A player's own seasons are not useful comparisons
+        mask &= self.player_ids != player_id
+
+        candidates = np.flatnonzero(mask)
+        k = min(max(k, 0), len(candidates))
+        if k == 0:
+            return []
+
+        # |a - b|^2 = |a|^2 - 2ab + |b|^2, with |b|^2 constant for the query
+        target = self.vectors[row]
+        distances = self.squared_norms[candidates] - 2 * self.vectors[candidates] @ target
+        distances += target @ target
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+
+        return [
+            {
+                "player_id": int(self.player_ids[i]),
+                "player_name": str(self.player_names[i]),
+                "season": str(self.seasons[i]),
+                "games": int(self.games[i]),
+                "distance": float(np.sqrt(max(distance, 0.0))),
+                "stats": {stat: float(self.values[i, j]) for j, stat in enumerate(LEADERBOARD_STATS)},
+            }
+            for i, distance in zip(candidates[nearest], distances[nearest])
+        ]
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """Return the latest similarity index, or None while the first one is being built."""
+    return _index
+
+
+def update_similarity_index(limiter: Optional[RateLimiter] = None,
+                            stop: Optional[threading.Event] = None) -> bool:
+    """Load every season's leaderboard and swap in a new index if any of them changed.
+
+    Meant to run in the background: past seasons come from the persisted
+    leaderboards, so only the first run fetches every season from upstream.
+    Seasons that fail are left out and retried on the next run. Returns
+    whether every season made it into the index.
+    """
+    global _index
+    last_year = season_year(current_season())
+    seasons = [season_id(year) for year in range(FIRST_SEASON_YEAR, last_year + 1)]
+
+    with _index_lock:
+        leaderboards = []
+        for season in seasons:
+            if stop is not None and stop.is_set():
+                break
+            try:
+                leaderboards.append(get_leaderboard(season, limiter))
+            except CircuitOpenError as e:
+                logger.warning("Similarity index update stopped at %s: %s", season, e)
+                break
+            except Exception as e:
+                logger.warning("Leaving %s out of the similarity index: %s", season, e)
+
+        # Leaderboards compare by identity, so a rebuilt season forces a new index
+        if leaderboards and (_index is None or _index.leaderboards != leaderboards):
+            _index = SimilarityIndex(leaderboards)
+        return len(leaderboards) == len(seasons)
@@ -0,0 +1,250 @@
+import os
+import secrets
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from nba_api.stats.static import teams as nba_teams
+
+# Simulations per unit of work. Every chunk gets its own child of the root
+# seed, so results for a seed do not depend on how many workers ran them.
+CHUNK_SIZE = 10_000
+
+# Upper bounds for a single request, and the size of the shared process pool
+MAX_SIMULATIONS = 1_000_000
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", str(os.cpu_count() or 1)))
+
+# Started once by the server; simulations run inline without it
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Conference seeds 1-6 go straight to the playoffs, 7-10 to the play-in
+PLAYOFF_SEEDS = 6
+PLAY_IN_SEEDS = 10
+
+# Former franchise abbreviations are listed under the conference the
+# franchise last played in with them
+EASTERN_CONFERENCE = {
+    "ATL", "BOS", "BKN", "CHA", "CHI", "CLE", "DET", "IND",
+    "MIA", "MIL", "NYK", "ORL", "PHI", "TOR", "WAS",
+    "CHH", "NJN", "WSB",
+}
+WESTERN_CONFERENCE = {
+    "DAL", "DEN", "GSW", "HOU", "LAC", "LAL", "MEM", "MIN",
+    "NOP", "OKC", "PHX", "POR", "SAC", "SAS", "UTA",
+    "NOH", "NOK", "SEA", "VAN",
+}
+
+
+def team_conference(team: str) -> Optional[str]:
+    """Return "East" or "West" for a team given by abbreviation, full name or nickname."""
+    abbreviation = team.upper()
+    if abbreviation not in EASTERN_CONFERENCE and abbreviation not in WESTERN_CONFERENCE:
+        match = next(
+            (t for t in nba_teams.get_teams()
+             if team.lower() in (t["full_name"].lower(), t["nickname"].lower())),
+            None
+        )
+        if match is None:
+            return None
+        abbreviation = match["abbreviation"]
+    return "East" if abbreviation in EASTERN_CONFERENCE else "West"
+
+
+class SeasonSchedule:
+    """Wins so far plus the remaining games, each with the home team's win probability."""
+
+    def __init__(self, teams: List[str], current_wins: np.ndarray, home: np.ndarray,
+                 away: np.ndarray, home_win_probability: np.ndarray):
+        self.teams = teams
+        self.current_wins = current_wins
+        self.home = home
+        self.away = away
+        self.home_win_probability = home_win_probability
+
+    @classmethod
+    def from_games(cls, games: Iterable[Any]) -> "SeasonSchedule":
+        """Build a schedule from Game rows.
+
+        Games with an actual_result (the winning team, or "home"/"away") count
+        towards current wins; the rest are simulated from their prediction,
+        the probability that the home team wins. Raises ValueError for a
+        result that names neither team.
+        """
+        games = list(games)
+        teams = sorted({g.home_team for g in games} | {g.away_team for g in games})
+        team_index = {team: i for i, team in enumerate(teams)}
+
+        current_wins = np.zeros(len(teams), dtype=np.int32)
+        home, away, probability = [], [], []
+        for game in games:
+            if game.actual_result:
+                current_wins[team_index[_winner(game)]] += 1
+            else:
+                home.append(team_index[game.home_team])
+                away.append(team_index[game.away_team])
+                probability.append(0.5 if game.prediction is None else game.prediction)
+
+        return cls(
+            teams,
+            current_wins,
+            np.array(home, dtype=np.int32),
+            np.array(away, dtype=np.int32),
+            np.clip(np.array(probability, dtype=np.float32), 0.0, 1.0),
+        )
+
+
+def _winner(game: Any) -> str:
+    result = game.actual_result.strip().lower()
+    if result in ("home", game.home_team.lower()):
+        return game.home_team
+    if result in ("away", game.away_team.lower()):
+        return game.away_team
+    # Guessing would either drop the game or count it for the wrong team
+    raise ValueError(
+        f"Game {game.id} ({game.away_team} at {game.home_team}) has actual_result "
+        f"{game.actual_result!r}; expected \"home\", \"away\" or one of its teams"
+    )
+
+
+def _conference_groups(teams: List[str]) -> Tuple[List[np.ndarray], List[str]]:
+    """Split teams into the groups they are seeded within.
+
+    Also returns the teams with no known conference; if there are any, the
+    whole league is seeded together as one group.
+    """
+    conferences = [team_conference(team) for team in teams]
+    unknown = [team for team, conference in zip(teams, conferences) if conference is None]
+    if unknown:
+        return [np.arange(len(teams))], unknown
+    return [
+        np.array([i for i, c in enumerate(conferences) if c == conference])
+        for conference in ("East", "West")
+        if conference in conferences
+    ], unknown
+
+
+def start_simulation_pool(workers: int = SIMULATION_WORKERS):
+    """Start the process pool shared by every simulation."""
+    global _pool
+    if _pool is None and workers > 1:
+        # Spawned workers start clean instead of forking a server that is
+        # already running background threads
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def stop_simulation_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _simulate_chunks(chunks: List[Tuple]) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulate several chunks in one worker and add up their counts."""
+    results = [_simulate_chunk(chunk) for chunk in chunks]
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def _simulate_chunk(args: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulate one chunk of seasons and return seed and win-total counts per team."""
+    schedule, groups, max_seed, max_wins, n_simulations, seed_sequence = args
+    rng = np.random.default_rng(seed_sequence)
+    n_teams = len(schedule.teams)
+    n_games = len(schedule.home)
+
+    # +1 for the home team and -1 for the away team of every game, so one
+    # matrix product turns home wins into win counts for all simulations
+    home_won = (rng.random((n_simulations, n_games), dtype=np.float32)
+                < schedule.home_win_probability).astype(np.float32)
+    swing = np.zeros((n_games, n_teams), dtype=np.float32)
+    swing[np.arange(n_games), schedule.home] += 1
+    swing[np.arange(n_games), schedule.away] -= 1
+    away_games = np.bincount(schedule.away, minlength=n_teams)
+    wins = np.rint(home_won @ swing).astype(np.int32) + away_games + schedule.current_wins
+
+    # Random tiebreaker below one win
+    score = wins + rng.random((n_simulations, n_teams))
+    seeds = np.zeros((n_simulations, n_teams), dtype=np.int32)
+    for group in groups:
+        order = np.argsort(-score[:, group], axis=1)
+        group_seeds = np.empty_like(order)
+        np.put_along_axis(group_seeds, order, np.arange(1, len(group) + 1)[None, :], axis=1)
+        seeds[:, group] = group_seeds
+
+    team_offsets = np.arange(n_teams)
+    seed_counts = np.bincount(
+        (team_offsets * (max_seed + 1) + seeds).ravel(),
+        minlength=n_teams * (max_seed + 1)
+    ).reshape(n_teams, max_seed + 1)
+    win_counts = np.bincount(
+        (team_offsets * (max_wins + 1) + wins).ravel(),
+        minlength=n_teams * (max_wins + 1)
+    ).reshape(n_teams, max_wins + 1)
+    return seed_counts, win_counts
+
+
+def simulate_season(schedule: SeasonSchedule, n_simulations: int = 100_000, seed: Optional[int] = None,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """Simulate the rest of the season and report seed, playoff and win-total odds per team."""
+    if not 1 <= n_simulations <= MAX_SIMULATIONS:
+        raise ValueError(f"Between 1 and {MAX_SIMULATIONS} simulations are allowed")
+    if not schedule.teams:
+        raise ValueError("No games to simulate")
+
+    n_teams = len(schedule.teams)
+    groups, unknown_conference = _conference_groups(schedule.teams)
+    max_seed = max(len(group) for group in groups)
+    games_left = np.bincount(np.concatenate([schedule.home, schedule.away]), minlength=n_teams)
+    max_wins = int((schedule.current_wins + games_left).max())
+
+    chunk_sizes = [min(CHUNK_SIZE, n_simulations - start) for start in range(0, n_simulations, CHUNK_SIZE)]
+    if seed is None:
+        # Small enough to survive JSON clients that read numbers as doubles
+        seed = secrets.randbits(53)
+    root_sequence = np.random.SeedSequence(seed)
+    seed_sequences = root_sequence.spawn(len(chunk_sizes))
+    chunks = [
+        (schedule, groups, max_seed, max_wins, size, seed_sequence)
+        for size, seed_sequence in zip(chunk_sizes, seed_sequences)
+    ]
+
+    # One task per worker, so a request never holds more of the shared pool
+    # than it asked for
+    workers = min(workers or SIMULATION_WORKERS, SIMULATION_WORKERS, len(chunks))
+    if _pool is not None and workers > 1:
+        futures = [_pool.submit(_simulate_chunks, chunks[i::workers]) for i in range(workers)]
+        results = [future.result() for future in futures]
+    else:
+        results = [_simulate_chunks(chunks)]
+
+    seed_counts = sum(r[0] for r in results)
+    win_counts = sum(r[1] for r in results)
+    seed_probabilities = seed_counts / n_simulations
+    win_probabilities = win_counts / n_simulations
+
+    report = {}
+    for i, team in enumerate(schedule.teams):
+        report[team] = {
+            "current_wins": int(schedule.current_wins[i]),
+            "games_left": int(games_left[i]),
+            "mean_wins": float(win_probabilities[i] @ np.arange(max_wins + 1)),
+            "win_totals": {
+                int(w): float(p) for w, p in enumerate(win_probabilities[i]) if p > 0
+            },
+            "seed_probabilities": {
+                int(s): float(p) for s, p in enumerate(seed_probabilities[i]) if p > 0
+            },
+            "playoff_probability": float(seed_probabilities[i, 1:PLAYOFF_SEEDS + 1].sum()),
+            "play_in_probability": float(seed_probabilities[i, PLAYOFF_SEEDS + 1:PLAY_IN_SEEDS + 1].sum()),
+        }
+
+    return {
+        "simulations": n_simulations,
+        # With a team of unknown conference, seeds and playoff odds are
+        # league-wide rather than per conference
+        "seeding": "league" if unknown_conference else "conference",
+        "unknown_conference_teams": unknown_conference,
+        # Passing this back as the seed reproduces the run
+        "seed": seed,
+        "teams": report,
+    }